@@ -1,15 +1,19 @@
 # src/agent_framework/audio/receiver.py
 
-from typing import Optional, Callable, Any
+from typing import Optional, Callable, Any, List
 import numpy as np
 import sounddevice as sd
-import soundfile as sf
 import asyncio
+import collections
+import itertools
 import logging
 import os
+import wave
 from datetime import datetime
 from dataclasses import dataclass
 
+from agent_framework.utils import audio_processing as ap
+
 # Import transcription services
 from agent_framework.audio.transcription import (
     TranscriptionConfig,
@@ -30,13 +34,29 @@ class AudioConfig:
     pre_roll: float = 0.5
     post_roll: float = 0.5
     queue_size: int = 100
+    batch_size: int = 8
+    # Seconds per chunk for streaming services; keep each chunk's LINEAR16
+    # audio under Speech v2's 25,600-byte limit per streaming request
+    stream_chunk: float = 0.1
     project_id: str = os.getenv("GOOGLE_CLOUD_PROJECT")
     transcription_service_type: str = 'google-chirp'
     api_key: Optional[str] = None
 
+# Markers bracketing a recording in the streaming event deque
+_STREAM_START = object()
+_STREAM_END = object()
+
+def _windowed_rms(samples: np.ndarray, window: int = 2048, hop: int = 512) -> np.ndarray:
+    """RMS level of every hop-spaced window, computed in one vectorized pass."""
+    window = min(window, len(samples))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, window)[::hop]
+    return np.sqrt(np.einsum('ij,ij->i', frames, frames) / window)
+
 class AudioReceiver:
     """Audio receiving component for transcription."""
 
+    DEBUG_DIR = "debug/audio"
+
     def __init__(
         self,
         config: AudioConfig,
@@ -48,8 +68,10 @@ class AudioReceiver:
         self.debug_mode = debug_mode
         self.logger = logging.getLogger("AudioReceiver")
 
-        # Initialize asyncio queues and flags
-        self.audio_queue = asyncio.Queue(maxsize=config.queue_size)
+        # Single-producer handoff from the audio thread: the callback appends
+        # to the deque and signals the wake event, the processor drains it.
+        self._pending = collections.deque(maxlen=config.queue_size)
+        self._wake = asyncio.Event()
         self.terminate_flag = asyncio.Event()
 
         # Initialize transcription service
@@ -58,19 +80,49 @@ class AudioReceiver:
             language="en-US",
             debug_mode=debug_mode,
             project_id=config.project_id,
-            api_key=config.api_key
+            api_key=config.api_key,
+            max_duration=config.max_duration
         )
         self.transcription_service: TranscriptionService = create_transcription_service(
             config.transcription_service_type,
             transcription_config
         )
 
-        # Initialize recording state
-        self.pre_roll_buffer = []
-        self.recording = False
-        self.audio_frames = []
-        self.silence_counter = 0.0
-        self.recording_duration = 0.0
+        # Preallocated ring buffer holding the most recent audio. Recordings
+        # are sliced out of it, so the callback never allocates per block;
+        # it is sized so a recording never wraps.
+        self.pre_roll_samples = int(config.pre_roll * config.sample_rate)
+        ring_samples = (
+            int(config.max_duration * config.sample_rate)
+            + self.pre_roll_samples
+            + config.sample_rate  # headroom for the block that crosses max_duration
+        )
+        self._ring = np.empty((ring_samples, config.channels), dtype=np.float32)
+
+        # Recording state and settings for ap.process_block, kept in flat
+        # arrays so the block kernel can run without touching Python objects.
+        # The kernel compares mean-square levels, so no sqrt per block.
+        self._state = np.zeros(ap.STATE_SIZE, dtype=np.float64)
+        self._cfg = np.zeros(ap.CONFIG_SIZE, dtype=np.float64)
+        self._cfg[ap.THRESHOLD_SQ] = config.audio_threshold ** 2
+        self._cfg[ap.INV_SAMPLE_RATE] = 1.0 / config.sample_rate
+        self._cfg[ap.SILENCE_THRESHOLD] = config.silence_threshold
+        self._cfg[ap.MIN_DURATION] = config.min_duration
+        self._cfg[ap.MAX_DURATION] = config.max_duration
+        self._cfg[ap.PRE_ROLL_SAMPLES] = self.pre_roll_samples
+        self._channels = config.channels
+
+        # Streaming services receive each recording in chunks while it is
+        # captured; the callback posts them to an unbounded deque so that a
+        # stream is never cut short.
+        self._streaming = self.transcription_service.supports_streaming
+        self._stream_events = collections.deque()
+        self._stream_chunk_samples = int(config.stream_chunk * config.sample_rate)
+        self._stream_open = False
+        self._streamed = 0
+
+        # Sequence number that keeps concurrent debug saves from colliding
+        self._debug_seq = itertools.count()
 
         # Reference to the event loop
         self.loop: Optional[asyncio.AbstractEventLoop] = None
@@ -84,11 +136,21 @@ class AudioReceiver:
             await self.transcription_service.initialize()
             await self._test_audio_input()
 
+            if self.debug_mode:
+                os.makedirs(self.DEBUG_DIR, exist_ok=True)
+
             # Start processing task
-            asyncio.create_task(self._process_audio_queue())
+            if self._streaming:
+                asyncio.create_task(self._process_audio_stream())
+            else:
+                asyncio.create_task(self._process_audio_queue())
+
+            # Compile the block kernel now rather than in the first callback
+            ap.warm_up(self.config.channels)
 
             # Start audio stream
-            self.stream = sd.InputStream(
+            # Raw stream hands the callback the PortAudio buffer directly
+            self.stream = sd.RawInputStream(
                 device=self.config.device_index,
                 samplerate=self.config.sample_rate,
                 channels=self.config.channels,
@@ -105,6 +167,7 @@ class AudioReceiver:
     async def stop(self):
         """Stop the audio receiver."""
         self.terminate_flag.set()
+        self._wake.set()
         if hasattr(self, 'stream'):
             self.stream.stop()
             self.stream.close()
@@ -112,12 +175,35 @@ class AudioReceiver:
         self.logger.info("Audio receiver stopped")
 
     async def _process_audio_queue(self):
-        """Process audio data from the queue."""
+        """Process audio data handed off by the audio callback."""
+        while not self.terminate_flag.is_set():
+            try:
+                await self._wake.wait()
+                self._wake.clear()
+                while self._pending:
+                    count = min(len(self._pending), self.config.batch_size)
+                    batch = [self._pending.popleft() for _ in range(count)]
+                    await self._transcribe_batch(batch)
+            except Exception as e:
+                self.logger.error(f"Error processing audio: {e}")
+
+    async def _process_audio_stream(self):
+        """Open a transcription stream per recording and feed it chunks as they arrive."""
+        chunks: Optional[asyncio.Queue] = None
+        previous: Optional[asyncio.Task] = None
         while not self.terminate_flag.is_set():
             try:
-                audio_data = await self.audio_queue.get()
-                if audio_data is not None:
-                    await self._transcribe_audio(audio_data)
+                await self._wake.wait()
+                self._wake.clear()
+                while self._stream_events:
+                    event = self._stream_events.popleft()
+                    if event is _STREAM_START:
+                        chunks = asyncio.Queue()
+                        previous = asyncio.create_task(self._transcribe_stream(chunks, previous))
+                    elif event is _STREAM_END:
+                        chunks.put_nowait(None)
+                    else:
+                        chunks.put_nowait(event)
             except Exception as e:
                 self.logger.error(f"Error processing audio: {e}")
 
@@ -126,81 +212,113 @@ class AudioReceiver:
         if status:
             self.logger.warning(f"Audio stream status: {status}")
 
-        rms = np.sqrt(np.mean(np.square(indata)))
-
-        # Update pre-roll buffer
-        self.pre_roll_buffer.append(indata.copy())
-        pre_roll_frames = int(self.config.pre_roll * self.config.sample_rate / frames)
-        if len(self.pre_roll_buffer) > pre_roll_frames:
-            self.pre_roll_buffer.pop(0)
-
-        if not self.recording and rms > self.config.audio_threshold:
-            self._start_recording()
-
-        if self.recording:
-            self._handle_recording(indata, rms, frames)
-
-    def _start_recording(self):
-        """Start a new recording."""
-        self.recording = True
-        self.audio_frames = self.pre_roll_buffer.copy()
-        self.silence_counter = 0.0
-        self.recording_duration = 0.0
-        self.logger.debug("Started recording")
-
-    def _handle_recording(self, indata, rms, frames):
-        """Handle ongoing recording state."""
-        self.audio_frames.append(indata.copy())
-        frame_duration = frames / self.config.sample_rate
-        self.recording_duration += frame_duration
-
-        if rms <= self.config.audio_threshold:
-            self.silence_counter += frame_duration
-        else:
-            self.silence_counter = 0.0
-
-        if self._should_stop_recording():
+        block = np.frombuffer(indata, dtype=np.float32).reshape(frames, self._channels)
+        block_status = ap.process_block(block, self._ring, self._state, self._cfg)
+        if block_status == ap.BLOCK_STARTED:
+            self.logger.debug("Started recording")
+        if self._streaming:
+            if self.recording or block_status == ap.BLOCK_READY:
+                self._stream_recording(block_status)
+        elif block_status == ap.BLOCK_READY:
             self._stop_recording()
 
-    def _should_stop_recording(self) -> bool:
-        """Determine if recording should stop."""
-        return (
-            (self.silence_counter >= self.config.silence_threshold or
-             self.recording_duration >= self.config.max_duration) and
-            self.recording_duration >= self.config.min_duration
-        )
+    @property
+    def recording(self) -> bool:
+        """Whether an utterance is currently being recorded."""
+        return self._state[ap.RECORDING] != 0.0
 
     def _stop_recording(self):
         """Stop recording and queue audio for processing."""
-        self.recording = False
-        audio_data = np.concatenate(self.audio_frames)
+        # Recordings are contiguous from the front of the ring; copy to
+        # detach from it before the next recording overwrites the samples
+        audio_data = self._ring[:int(self._state[ap.WRITE_IDX])].copy()
         try:
-            if self.loop is not None and not self.audio_queue.full():
-                # Schedule the coroutine safely in the event loop
-                self.loop.call_soon_threadsafe(
-                    lambda: asyncio.create_task(self.audio_queue.put(audio_data))
-                )
+            if self.loop is not None and len(self._pending) < self._pending.maxlen:
+                # Hand off without scheduling a coroutine from the audio thread
+                self._pending.append(audio_data)
+                self.loop.call_soon_threadsafe(self._wake.set)
                 self.logger.debug("Queued audio for processing")
             else:
                 self.logger.warning("Audio queue full or event loop not set, dropping audio frame")
         except RuntimeError as e:
             self.logger.error(f"Failed to enqueue audio data: {e}")
-        self.audio_frames = []
 
-    async def _transcribe_audio(self, audio_data):
-        """Transcribe audio using the configured service."""
+    def _stream_recording(self, block_status):
+        """Post the part of the current recording not yet streamed, in chunks."""
+        if not self._stream_open:
+            self._stream_open = True
+            self._streamed = 0
+            self._post_stream_event(_STREAM_START)
+
+        # The recording is contiguous from the front of the ring
+        write = int(self._state[ap.WRITE_IDX])
+        finished = block_status == ap.BLOCK_READY
+        spans = ap.stream_spans(self._streamed, write, self._stream_chunk_samples, finished)
+        for lo, hi in spans:
+            self._post_stream_event(self._ring[lo:hi].copy())
+        if spans:
+            self._streamed = spans[-1][1]
+
+        if finished:
+            self._stream_open = False
+            self._post_stream_event(_STREAM_END)
+            self.logger.debug("Finished streaming recording")
+
+    def _post_stream_event(self, event):
+        """Hand a streaming event to the processor from the audio thread."""
+        self._stream_events.append(event)
+        self.loop.call_soon_threadsafe(self._wake.set)
+
+    async def _transcribe_stream(self, chunks: asyncio.Queue, previous: Optional[asyncio.Task]):
+        """Stream one recording to the service and dispatch its transcript in order."""
+        received = []
+
+        async def audio_chunks():
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    return
+                if self.debug_mode:
+                    received.append(chunk)
+                yield chunk
+
+        try:
+            result = await self.transcription_service.transcribe_stream(audio_chunks())
+            if previous is not None:
+                await previous
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return
+
+        audio_data = np.concatenate(received) if received else None
+        await self._dispatch_transcription(audio_data, result)
+
+    async def _transcribe_batch(self, batch):
+        """Transcribe queued utterances concurrently and dispatch results in order."""
         try:
-            self.logger.debug("Sending audio to Google Chirp...")
-            # Example of making a request (ensure your transcription service implements this)
-            # self.logger.debug(f"Making request: POST https://example.com/transcribe")
-            # ... transcription logic ...
+            self.logger.debug(f"Sending {len(batch)} utterance(s) for transcription...")
+            results: List[Optional[TranscriptionResult]] = (
+                await self.transcription_service.transcribe_batch(batch)
+            )
+        except Exception as e:
+            self.logger.error(f"Transcription error: {e}")
+            return
 
-            result: Optional[TranscriptionResult] = await self.transcription_service.transcribe(audio_data)
+        for audio_data, result in zip(batch, results):
+            await self._dispatch_transcription(audio_data, result)
+
+    async def _dispatch_transcription(self, audio_data, result: Optional[TranscriptionResult]):
+        """Deliver a transcription result to the callback."""
+        try:
             if result and result.text:
                 self.logger.debug(f"Transcribed: {result.text}")
                 await self.on_transcription(result.text)  # Await the coroutine
-                if self.debug_mode:
-                    self._save_debug_data(audio_data, result.text)
+                if self.debug_mode and audio_data is not None:
+                    # Write to disk off the event loop; not awaited
+                    save = self.loop.run_in_executor(
+                        None, self._save_debug_data, audio_data, result.text
+                    )
+                    save.add_done_callback(self._log_debug_save_error)
         except Exception as e:
             self.logger.error(f"Transcription error: {e}")
 
@@ -217,27 +335,36 @@ class AudioReceiver:
             dtype='float32'
         )
         sd.wait()
-        rms = np.sqrt(np.mean(np.square(recording)))
+        rms = _windowed_rms(recording[:, 0])
 
-        self.logger.info(f"Current RMS level: {rms:.6f}")
+        self.logger.info(f"Current RMS level: mean {rms.mean():.6f}, max {rms.max():.6f}")
         self.logger.info(f"Audio threshold: {self.config.audio_threshold:.6f}")
 
-        if rms < 0.001:
+        if rms.mean() < 0.001:
             self.logger.warning("Very low audio levels detected")
         else:
             self.logger.info("Audio input test passed")
 
     def _save_debug_data(self, audio_data, transcription):
-        """Save debug information to disk."""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        debug_dir = "debug/audio"
-        os.makedirs(debug_dir, exist_ok=True)
+        """Save debug information to disk. Runs in the default executor."""
+        timestamp = f"{datetime.now():%Y%m%d_%H%M%S}_{next(self._debug_seq):04d}"
+        debug_dir = self.DEBUG_DIR
 
         # Save audio
         audio_path = f"{debug_dir}/audio_{timestamp}.wav"
-        sf.write(audio_path, audio_data, self.config.sample_rate)
+        pcm = np.clip(np.rint(audio_data * 32767), -32768, 32767).astype('<i2')
+        with wave.open(audio_path, 'wb') as w:
+            w.setnchannels(self.config.channels)
+            w.setsampwidth(2)
+            w.setframerate(self.config.sample_rate)
+            w.writeframes(pcm.tobytes())
 
         # Save transcription
         trans_path = f"{debug_dir}/trans_{timestamp}.txt"
         with open(trans_path, 'w') as f:
             f.write(transcription)
+
+    def _log_debug_save_error(self, future):
+        """Report a failed debug save as soon as it finishes."""
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"Failed to save debug data: {future.exception()}")
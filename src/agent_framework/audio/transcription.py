@@ -1,16 +1,57 @@
 # src/agent_framework/audio/transcription.py
 
 from abc import ABC, abstractmethod
+import asyncio
 import io
-from typing import Optional
+import struct
+from typing import AsyncIterator, Dict, List, Optional
 from dataclasses import dataclass
-import soundfile as sf
+import numpy as np
+from scipy.signal import resample_poly
 import logging
 import openai  # Ensure openai is imported
 from google.api_core.client_options import ClientOptions
-from google.cloud.speech_v2 import SpeechClient
+from google.cloud.speech_v2 import SpeechAsyncClient
 from google.cloud.speech_v2.types import cloud_speech
 
+# Both Chirp and Whisper resample to 16 kHz internally, so send that directly
+TARGET_SAMPLE_RATE = 16000
+
+# Canonical 44-byte RIFF header for mono 16-bit PCM
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Speech clients shared by every service in the process, keyed by endpoint.
+# Each open a gRPC channel, so they are reference counted and only closed
+# once the last service using them is cleaned up.
+_speech_clients: Dict[str, SpeechAsyncClient] = {}
+_speech_client_refs: Dict[str, int] = {}
+
+def _acquire_speech_client(endpoint: str) -> SpeechAsyncClient:
+    """Return the shared client for an endpoint, creating it on first use."""
+    if endpoint not in _speech_clients:
+        _speech_clients[endpoint] = SpeechAsyncClient(
+            client_options=ClientOptions(api_endpoint=endpoint)
+        )
+        _speech_client_refs[endpoint] = 0
+    _speech_client_refs[endpoint] += 1
+    return _speech_clients[endpoint]
+
+async def _release_speech_client(endpoint: str) -> None:
+    """Drop a reference to a shared client, closing it when none remain."""
+    _speech_client_refs[endpoint] -= 1
+    if _speech_client_refs[endpoint] == 0:
+        del _speech_client_refs[endpoint]
+        client = _speech_clients.pop(endpoint)
+        await client.transport.close()
+
+def _to_mono(audio_data: np.ndarray) -> np.ndarray:
+    """Flatten (frames, channels) audio to a single channel."""
+    if audio_data.ndim == 1:
+        return audio_data
+    if audio_data.shape[1] == 1:
+        return audio_data.reshape(-1)
+    return audio_data.mean(axis=1)
+
 @dataclass
 class TranscriptionConfig:
     """Base configuration for transcription services."""
@@ -19,6 +60,7 @@ class TranscriptionConfig:
     debug_mode: bool = False
     project_id: Optional[str] = None  # For Google Chirp
     api_key: Optional[str] = None      # For OpenAI Whisper
+    max_duration: float = 30.0         # Sizes the PCM scratch buffers
 
 @dataclass
 class TranscriptionResult:
@@ -31,9 +73,17 @@ class TranscriptionResult:
 class TranscriptionService(ABC):
     """Abstract base class for transcription services."""
 
+    # Services that set this accept audio while it is still being captured
+    # and implement transcribe_stream(chunks)
+    supports_streaming = False
+
     def __init__(self, config: TranscriptionConfig):
         self.config = config
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.client = None  # Set by initialize()
+
+        # Scratch buffers reused by _prepare_audio across utterances
+        self._allocate_scratch(int(config.max_duration * TARGET_SAMPLE_RATE))
 
     @abstractmethod
     async def initialize(self) -> None:
@@ -45,49 +95,82 @@ class TranscriptionService(ABC):
         """Transcribe audio data to text."""
         pass
 
+    async def transcribe_batch(self, audio_batch: List) -> List[Optional[TranscriptionResult]]:
+        """Transcribe several utterances concurrently, preserving their order."""
+        return list(await asyncio.gather(*(self.transcribe(audio) for audio in audio_batch)))
+
     async def cleanup(self) -> None:
         """Cleanup resources. Override if needed."""
         pass
 
+    def _allocate_scratch(self, samples: int) -> None:
+        self._scratch_f32 = np.empty(samples, dtype=np.float32)
+        self._scratch_i16 = np.empty(samples, dtype='<i2')
+
+    def _to_pcm16(self, audio_data) -> np.ndarray:
+        """Convert mono float samples to int16, returning a view of the scratch buffer."""
+        # Recordings can run past max_duration by the pre-roll and last block
+        samples = len(audio_data)
+        if samples > len(self._scratch_i16):
+            self._allocate_scratch(samples)
+        scaled = self._scratch_f32[:samples]
+        pcm = self._scratch_i16[:samples]
+        np.multiply(audio_data, 32767.0, out=scaled)
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        pcm[:] = scaled
+        return pcm
+
     def _prepare_audio(self, audio_data) -> io.BytesIO:
-        """Convert numpy array to WAV format."""
+        """Convert numpy array to 16 kHz mono PCM_16 WAV format."""
+        audio_data = _to_mono(audio_data)
+        if self.config.sample_rate != TARGET_SAMPLE_RATE:
+            audio_data = resample_poly(audio_data, TARGET_SAMPLE_RATE, self.config.sample_rate)
+        pcm = self._to_pcm16(audio_data)
+
+        header = _WAV_HEADER.pack(
+            b'RIFF', 36 + pcm.nbytes, b'WAVE',
+            b'fmt ', 16, 1, 1, TARGET_SAMPLE_RATE, TARGET_SAMPLE_RATE * 2, 2, 16,
+            b'data', pcm.nbytes
+        )
         audio_buffer = io.BytesIO()
-        sf.write(audio_buffer, audio_data, self.config.sample_rate,
-                format='WAV', subtype='PCM_16')
+        audio_buffer.write(header)
+        audio_buffer.write(memoryview(pcm))
         audio_buffer.seek(0)
         return audio_buffer
 
 class GoogleChirpService(TranscriptionService):
     """Google Cloud Chirp transcription service."""
 
+    model = "chirp"
+    endpoint = "us-central1-speech.googleapis.com"
+
     async def initialize(self) -> None:
         if not self.config.project_id:
             raise ValueError("project_id must be set for GoogleChirpService")
 
-        self.client = SpeechClient(
-            client_options=ClientOptions(
-                api_endpoint="us-central1-speech.googleapis.com",
-            )
+        self.client = _acquire_speech_client(self.endpoint)
+
+        # Built once; identical for every request
+        self._recognizer = f"projects/{self.config.project_id}/locations/us-central1/recognizers/_"
+        self._recognition_config = cloud_speech.RecognitionConfig(
+            auto_decoding_config=cloud_speech.AutoDetectDecodingConfig(),
+            language_codes=[self.config.language],
+            model=self.model,
         )
 
     async def transcribe(self, audio_data) -> Optional[TranscriptionResult]:
         try:
             audio_content = self._prepare_audio(audio_data).read()
 
-            config = cloud_speech.RecognitionConfig(
-                auto_decoding_config=cloud_speech.AutoDetectDecodingConfig(),
-                language_codes=[self.config.language],
-                model="chirp",
-            )
-
             request = cloud_speech.RecognizeRequest(
-                recognizer=f"projects/{self.config.project_id}/locations/us-central1/recognizers/_",
-                config=config,
+                recognizer=self._recognizer,
+                config=self._recognition_config,
                 content=audio_content,
             )
 
             self.logger.debug("Sending audio to Google Chirp...")
-            response = self.client.recognize(request=request)
+            response = await self.client.recognize(request=request)
 
             if response.results:
                 result = response.results[0].alternatives[0]
@@ -103,14 +186,81 @@ class GoogleChirpService(TranscriptionService):
             self.logger.error(f"Google Chirp transcription error: {e}")
             return None
 
+    async def cleanup(self) -> None:
+        # Release only a client this service acquired, and only once
+        if self.client is not None:
+            self.client = None
+            await _release_speech_client(self.endpoint)
+
+class GoogleChirpStreamingService(GoogleChirpService):
+    """Google Cloud Chirp 2 service that transcribes audio while it is captured."""
+
+    model = "chirp_2"
+    supports_streaming = True
+
+    async def initialize(self) -> None:
+        await super().initialize()
+
+        # Chunks are sent as raw PCM at the capture rate; resampling each
+        # chunk separately would leave filter edges at every boundary
+        self._streaming_config = cloud_speech.StreamingRecognitionConfig(
+            config=cloud_speech.RecognitionConfig(
+                explicit_decoding_config=cloud_speech.ExplicitDecodingConfig(
+                    encoding=cloud_speech.ExplicitDecodingConfig.AudioEncoding.LINEAR16,
+                    sample_rate_hertz=self.config.sample_rate,
+                    audio_channel_count=1,
+                ),
+                language_codes=[self.config.language],
+                model=self.model,
+            )
+        )
+
+    async def transcribe_stream(self, chunks: AsyncIterator) -> Optional[TranscriptionResult]:
+        """Transcribe one utterance delivered as consecutive audio chunks."""
+        try:
+            async def requests():
+                yield cloud_speech.StreamingRecognizeRequest(
+                    recognizer=self._recognizer,
+                    streaming_config=self._streaming_config,
+                )
+                async for chunk in chunks:
+                    yield cloud_speech.StreamingRecognizeRequest(
+                        audio=self._to_pcm16(_to_mono(chunk)).tobytes()
+                    )
+
+            self.logger.debug("Streaming audio to Google Chirp...")
+            responses = await self.client.streaming_recognize(requests=requests())
+
+            transcripts = []
+            confidence = 1.0
+            async for response in responses:
+                for result in response.results:
+                    if result.is_final and result.alternatives:
+                        alternative = result.alternatives[0]
+                        transcripts.append(alternative.transcript.strip())
+                        confidence = min(confidence, alternative.confidence)
+
+            text = " ".join(t for t in transcripts if t)
+            if text:
+                return TranscriptionResult(
+                    text=text,
+                    confidence=confidence,
+                    language=self.config.language
+                )
+
+            return None
+
+        except Exception as e:
+            self.logger.error(f"Google Chirp streaming error: {e}")
+            return None
+
 class OpenAIWhisperService(TranscriptionService):
     """OpenAI Whisper transcription service."""
 
     async def initialize(self) -> None:
         if not self.config.api_key:
             raise ValueError("api_key must be set for OpenAIWhisperService")
-        openai.api_key = self.config.api_key
-        self.client = openai
+        self.client = openai.AsyncOpenAI(api_key=self.config.api_key)
 
     async def transcribe(self, audio_data) -> Optional[TranscriptionResult]:
         try:
@@ -118,14 +268,14 @@ class OpenAIWhisperService(TranscriptionService):
             audio_buffer.name = 'audio.wav'  # Required by OpenAI
 
             self.logger.debug("Sending audio to Whisper...")
-            response = self.client.Audio.transcriptions.create(
+            response = await self.client.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_buffer,
                 language=self.config.language.split('-')[0]  # Convert en-US to en
             )
 
             return TranscriptionResult(
-                text=response['text'].strip(),
+                text=response.text.strip(),
                 language=self.config.language
             )
 
@@ -133,11 +283,17 @@ class OpenAIWhisperService(TranscriptionService):
             self.logger.error(f"Whisper transcription error: {e}")
             return None
 
+    async def cleanup(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
 # Factory for creating transcription services
 def create_transcription_service(service_type: str, config: TranscriptionConfig) -> TranscriptionService:
     """Factory function to create transcription services."""
     services = {
         'google-chirp': GoogleChirpService,
+        'google-chirp-streaming': GoogleChirpStreamingService,
         'openai-whisper': OpenAIWhisperService
     }
 
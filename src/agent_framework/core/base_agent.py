@@ -2,9 +2,11 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Any
+from typing import Deque, Dict, List, Optional, Any
 from enum import Enum
 import asyncio
+import collections
+import itertools
 import logging
 from datetime import datetime
 
@@ -24,16 +26,15 @@ class Message:
 
 class ConversationHistory:
     def __init__(self, max_length: int = 100):
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = collections.deque(maxlen=max_length)
         self.max_length = max_length
     
     def add_message(self, message: Message):
         self.messages.append(message)
-        if len(self.messages) > self.max_length:
-            self.messages.pop(0)
     
     def get_recent_messages(self, count: int) -> List[Message]:
-        return self.messages[-count:]
+        total = len(self.messages)
+        return list(itertools.islice(self.messages, max(0, total - count), total))
 
 class BaseAgent(ABC):
     """Base class for all agents in the Launch Control framework."""
@@ -48,6 +49,10 @@ class BaseAgent(ABC):
         # Initialize components
         self.audio_receiver = None
         self.audio_transmitter = None
+
+        # Inputs pushed by callbacks, consumed by the main loop
+        self._input_queue: Deque[Any] = collections.deque()
+        self._input_event = asyncio.Event()
         
     async def initialize(self):
         """Initialize agent components and connections."""
@@ -77,24 +82,27 @@ class BaseAgent(ABC):
         pass
     
     async def start(self):
-        """Start the agent's main processing loop."""
+        """Start the agent's main processing loop.
+
+        Runs until the state leaves LISTENING, e.g. when stop() sets IDLE.
+        """
         self.state = AgentState.LISTENING
-        try:
-            while True:
-                if self.state == AgentState.LISTENING:
-                    input_data = await self._receive_input()
-                    if input_data:
-                        self.state = AgentState.PROCESSING
-                        response = await self.process_input(input_data)
-                        if response:
-                            self.state = AgentState.RESPONDING
-                            await self._send_response(response)
-                        self.state = AgentState.LISTENING
-                await asyncio.sleep(0.1)
-        except Exception as e:
-            self.state = AgentState.ERROR
-            self.logger.error(f"Agent error: {str(e)}")
-            raise
+        while self.state == AgentState.LISTENING:
+            input_data = await self._receive_input()
+            if not input_data:
+                continue
+            try:
+                self.state = AgentState.PROCESSING
+                response = await self.process_input(input_data)
+                if response:
+                    self.state = AgentState.RESPONDING
+                    await self._send_response(response)
+            except Exception as e:
+                self.logger.error(f"Error handling input: {str(e)}")
+            finally:
+                # Keep listening unless stop() changed the state meanwhile
+                if self.state in (AgentState.PROCESSING, AgentState.RESPONDING):
+                    self.state = AgentState.LISTENING
     
     async def stop(self):
         """Stop the agent and cleanup resources."""
@@ -105,11 +113,19 @@ class BaseAgent(ABC):
             await self.audio_transmitter.cleanup()
         self.logger.info(f"Agent {self.agent_id} stopped")
     
-    @abstractmethod
     async def _receive_input(self) -> Optional[Any]:
-        """Receive and preprocess input data."""
-        pass
-    
+        """Wait for the next input queued by _submit_input."""
+        await self._input_event.wait()
+        input_data = self._input_queue.popleft()
+        if not self._input_queue:
+            self._input_event.clear()
+        return input_data
+
+    def _submit_input(self, input_data: Any):
+        """Queue input for the main loop and wake it."""
+        self._input_queue.append(input_data)
+        self._input_event.set()
+
     @abstractmethod
     async def _send_response(self, response: str):
         """Send agent response through appropriate channel."""
@@ -127,7 +143,7 @@ class BaseAgent(ABC):
     def get_conversation_history(self, message_count: int = None) -> List[Message]:
         """Get recent conversation history."""
         if message_count is None:
-            return self.conversation_history.messages
+            return list(self.conversation_history.messages)
         return self.conversation_history.get_recent_messages(message_count)
 
 class AgentException(Exception):
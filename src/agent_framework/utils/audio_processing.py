@@ -0,0 +1,118 @@
+# src/agent_framework/utils/audio_processing.py
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the plain NumPy version
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# Return codes from process_block
+BLOCK_IDLE = 0
+BLOCK_STARTED = 1
+BLOCK_READY = 2
+
+# Indices into the float64 state array updated by process_block
+WRITE_IDX = 0
+RING_FILLED = 1
+RECORDING = 2
+SILENCE_COUNTER = 3
+RECORDING_DURATION = 4
+STATE_SIZE = 5
+
+# Indices into the float64 config array read by process_block
+THRESHOLD_SQ = 0
+INV_SAMPLE_RATE = 1
+SILENCE_THRESHOLD = 2
+MIN_DURATION = 3
+MAX_DURATION = 4
+PRE_ROLL_SAMPLES = 5
+CONFIG_SIZE = 6
+
+@njit(nogil=True, cache=True)
+def process_block(indata, ring, state, cfg):
+    """Capture one audio block into the ring buffer and update recording state.
+
+    A recording always starts at the front of the ring, so once
+    BLOCK_READY is returned the utterance is ring[:state[WRITE_IDX]].
+    Returns BLOCK_STARTED when the block starts a recording. With numba
+    installed this runs without holding the GIL.
+    """
+    frames = indata.shape[0]
+    ring_len = ring.shape[0]
+
+    flat = indata.reshape(indata.size)
+    mean_sq = np.dot(flat, flat) / flat.size
+
+    # Copy the block into the ring, wrapping at the end
+    start = int(state[WRITE_IDX])
+    end = start + frames
+    if end <= ring_len:
+        ring[start:end] = indata
+    else:
+        split = ring_len - start
+        ring[start:] = indata[:split]
+        ring[:end - ring_len] = indata[split:]
+    state[WRITE_IDX] = end % ring_len
+    state[RING_FILLED] = min(state[RING_FILLED] + frames, ring_len)
+
+    status = BLOCK_IDLE
+    if state[RECORDING] == 0.0:
+        if mean_sq <= cfg[THRESHOLD_SQ]:
+            return BLOCK_IDLE
+        # Move the triggering block plus the pre-roll that preceded it to the
+        # front of the ring so the whole recording is one contiguous slice
+        lookback = int(min(cfg[PRE_ROLL_SAMPLES] + frames, state[RING_FILLED]))
+        write = int(state[WRITE_IDX])
+        begin = (write - lookback) % ring_len
+        if begin != 0:
+            if begin < write:
+                head = ring[begin:write].copy()
+            else:
+                head = np.concatenate((ring[begin:], ring[:write]))
+            ring[:lookback] = head
+        state[WRITE_IDX] = lookback
+        state[RECORDING] = 1.0
+        state[SILENCE_COUNTER] = 0.0
+        state[RECORDING_DURATION] = 0.0
+        status = BLOCK_STARTED
+
+    frame_duration = frames * cfg[INV_SAMPLE_RATE]
+    state[RECORDING_DURATION] += frame_duration
+    if mean_sq <= cfg[THRESHOLD_SQ]:
+        state[SILENCE_COUNTER] += frame_duration
+    else:
+        state[SILENCE_COUNTER] = 0.0
+
+    if ((state[SILENCE_COUNTER] >= cfg[SILENCE_THRESHOLD] or
+         state[RECORDING_DURATION] >= cfg[MAX_DURATION]) and
+            state[RECORDING_DURATION] >= cfg[MIN_DURATION]):
+        state[RECORDING] = 0.0
+        return BLOCK_READY
+
+    return status
+
+def stream_spans(streamed: int, write: int, chunk: int, finished: bool):
+    """Split the unsent part [streamed, write) of a recording into chunk-sized spans.
+
+    While recording only whole chunks are returned, leaving any remainder for
+    a later call; once finished the final partial chunk is included too.
+    """
+    end = write if finished else streamed + (write - streamed) // chunk * chunk
+    return [(lo, min(lo + chunk, end)) for lo in range(streamed, end, chunk)]
+
+def warm_up(channels: int) -> None:
+    """Compile process_block ahead of time so the first audio callback doesn't.
+
+    The callback wraps the PortAudio buffer with np.frombuffer, which may be
+    read-only, so both writable and read-only input blocks are compiled.
+    """
+    ring = np.zeros((4, channels), dtype=np.float32)
+    cfg = np.zeros(CONFIG_SIZE, dtype=np.float64)
+    writable = np.zeros((1, channels), dtype=np.float32)
+    read_only = np.frombuffer(writable.tobytes(), dtype=np.float32).reshape(1, channels)
+    for block in (writable, read_only):
+        process_block(block, ring, np.zeros(STATE_SIZE, dtype=np.float64), cfg)
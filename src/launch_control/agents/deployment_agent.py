@@ -15,6 +15,7 @@ class DeploymentAgent(BaseAgent):
         self.logger = logging.getLogger(f"deployment_agent.{agent_id}")
         self.audio_receiver: Optional[AudioReceiver] = None
         self.gemini_api_key: Optional[str] = None
+        self._main_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Initialize the agent."""
@@ -79,15 +80,8 @@ class DeploymentAgent(BaseAgent):
         )
         self.conversation_history.add_message(message)
 
-        # Process the input
-        response = await self.process_input(text)
-        if response:
-            await self._send_response(response)
-
-    async def _receive_input(self) -> Optional[Any]:
-        """Not actively used since we're using callback-based audio receiver."""
-        await asyncio.sleep(0.1)
-        return None
+        # Hand off to the main loop for processing
+        self._submit_input(text)
 
     async def _send_response(self, response: str):
         """Handle sending responses."""
@@ -107,11 +101,20 @@ class DeploymentAgent(BaseAgent):
         self.logger.debug("Starting DeploymentAgent...")
         # Start the AudioReceiver
         await self.audio_receiver.start()
-        # Add any additional startup tasks here if needed
+        # Run the main processing loop alongside the callback-driven receiver
+        self._main_task = asyncio.create_task(super().start())
 
     async def stop(self):
         """Stop the agent's main functionality."""
         self.logger.debug("Stopping DeploymentAgent...")
+        self.state = AgentState.IDLE
+        if self._main_task:
+            self._main_task.cancel()
+            try:
+                await self._main_task
+            except asyncio.CancelledError:
+                pass
+            self._main_task = None
         if self.audio_receiver:
             await self.audio_receiver.stop()
         # Stop any other components or tasks here if necessary
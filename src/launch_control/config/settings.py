@@ -24,7 +24,7 @@ PRE_ROLL_DURATION = float(os.getenv('PRE_ROLL_DURATION', 0.5))
 POST_ROLL_DURATION = float(os.getenv('POST_ROLL_DURATION', 0.5))
 
 # Transcription service configuration
-# Options: 'google-chirp', 'openai-whisper'
+# Options: 'google-chirp', 'google-chirp-streaming', 'openai-whisper'
 TRANSCRIPTION_SERVICE_TYPE = os.getenv('TRANSCRIPTION_SERVICE_TYPE', 'google-chirp')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')  # Required if TRANSCRIPTION_SERVICE_TYPE is 'openai-whisper'
 
@@ -0,0 +1,89 @@
+import numpy as np
+
+from agent_framework.utils import audio_processing as ap
+
+SAMPLE_RATE = 1000
+BLOCK = 50
+PRE_ROLL = 200
+
+def _kernel(ring_len, max_duration=3.0):
+    """Fresh ring, state and config arrays for process_block."""
+    ring = np.empty((ring_len, 1), dtype=np.float32)
+    state = np.zeros(ap.STATE_SIZE, dtype=np.float64)
+    cfg = np.zeros(ap.CONFIG_SIZE, dtype=np.float64)
+    cfg[ap.THRESHOLD_SQ] = 0.01 ** 2
+    cfg[ap.INV_SAMPLE_RATE] = 1.0 / SAMPLE_RATE
+    cfg[ap.SILENCE_THRESHOLD] = 0.3
+    cfg[ap.MIN_DURATION] = 0.1
+    cfg[ap.MAX_DURATION] = max_duration
+    cfg[ap.PRE_ROLL_SAMPLES] = PRE_ROLL
+    return ring, state, cfg
+
+def _blocks(pattern):
+    """Blocks with a unique value per sample; 'q' is below threshold, 'L' above."""
+    blocks = []
+    for i, kind in enumerate(pattern):
+        ramp = 1e-6 * np.arange(i * BLOCK, (i + 1) * BLOCK, dtype=np.float32)
+        level = np.float32(0.1) if kind == 'L' else np.float32(0.0)
+        blocks.append((level + ramp).reshape(BLOCK, 1))
+    return blocks
+
+def _record(blocks, ring, state, cfg):
+    """Feed blocks until a recording completes; return its samples and statuses."""
+    statuses = []
+    for block in blocks:
+        statuses.append(ap.process_block(block, ring, state, cfg))
+        if statuses[-1] == ap.BLOCK_READY:
+            return ring[:int(state[ap.WRITE_IDX])].copy(), statuses
+    return None, statuses
+
+def _expected(blocks, first, last):
+    """Samples from blocks[first:last + 1], trimmed to the pre-roll at the start."""
+    audio = np.concatenate(blocks[:last + 1])
+    return audio[max(0, first * BLOCK - PRE_ROLL):]
+
+def test_recording_after_ring_wrap_joins_both_ends():
+    # 21 quiet blocks wrap a 1000-sample ring, so the pre-roll straddles the end
+    blocks = _blocks('q' * 21 + 'L' * 4 + 'q' * 10)
+    audio, statuses = _record(blocks, *_kernel(1000))
+
+    assert statuses[21] == ap.BLOCK_STARTED
+    assert statuses[-1] == ap.BLOCK_READY
+    assert len(statuses) == 31  # 6 quiet blocks reach the silence threshold
+    assert len(audio) == PRE_ROLL + 10 * BLOCK
+    np.testing.assert_array_equal(audio, _expected(blocks, 21, 30))
+
+def test_recording_moves_unwrapped_pre_roll_to_front():
+    blocks = _blocks('q' * 25 + 'L' * 4 + 'q' * 10)
+    audio, statuses = _record(blocks, *_kernel(1000))
+
+    assert statuses[25] == ap.BLOCK_STARTED
+    assert len(audio) == PRE_ROLL + 10 * BLOCK
+    np.testing.assert_array_equal(audio, _expected(blocks, 25, 34))
+
+def test_pre_roll_is_limited_to_audio_captured_so_far():
+    blocks = _blocks('q' + 'L' * 4 + 'q' * 10)
+    ring, state, cfg = _kernel(1000)
+    audio, statuses = _record(blocks, ring, state, cfg)
+
+    assert statuses[1] == ap.BLOCK_STARTED
+    assert len(audio) == 2 * BLOCK + 9 * BLOCK
+    np.testing.assert_array_equal(audio, np.concatenate(blocks[:11]))
+
+def test_recording_stops_at_max_duration():
+    blocks = _blocks('q' * 10 + 'L' * 20)
+    ring, state, cfg = _kernel(2000, max_duration=0.475)
+    audio, statuses = _record(blocks, ring, state, cfg)
+
+    # The triggering block counts towards the duration: 10 blocks reach 0.5 s
+    assert statuses[10] == ap.BLOCK_STARTED
+    assert len(statuses) == 20
+    assert state[ap.RECORDING] == 0.0
+    assert state[ap.RECORDING_DURATION] >= cfg[ap.MAX_DURATION]
+    np.testing.assert_array_equal(audio, _expected(blocks, 10, 19))
+
+def test_stream_spans_holds_back_partial_chunk_until_finished():
+    assert ap.stream_spans(0, 250, 100, finished=False) == [(0, 100), (100, 200)]
+    assert ap.stream_spans(200, 250, 100, finished=False) == []
+    assert ap.stream_spans(200, 250, 100, finished=True) == [(200, 250)]
+    assert ap.stream_spans(250, 250, 100, finished=True) == []
@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+try:
+    from agent_framework.audio import receiver
+    from agent_framework.audio.transcription import TranscriptionService
+except (ImportError, OSError) as e:  # e.g. PortAudio missing for sounddevice
+    pytest.skip(f"audio receiver unavailable: {e}", allow_module_level=True)
+
+SAMPLE_RATE = 1000
+BLOCK = 50
+PRE_ROLL = 200
+CHUNK = 100
+
+class StreamingStub(TranscriptionService):
+    supports_streaming = True
+
+    async def initialize(self):
+        pass
+
+    async def transcribe(self, audio_data):
+        return None
+
+    async def transcribe_stream(self, chunks):
+        return None
+
+@pytest.fixture
+def audio_receiver(monkeypatch):
+    monkeypatch.setattr(
+        receiver, "create_transcription_service",
+        lambda service_type, config: StreamingStub(config)
+    )
+    config = receiver.AudioConfig(
+        sample_rate=SAMPLE_RATE,
+        audio_threshold=0.01,
+        silence_threshold=0.3,
+        min_duration=0.1,
+        max_duration=3.0,
+        pre_roll=PRE_ROLL / SAMPLE_RATE,
+        stream_chunk=CHUNK / SAMPLE_RATE,
+    )
+    audio_receiver = receiver.AudioReceiver(config, on_transcription=None)
+    audio_receiver.loop = asyncio.new_event_loop()
+    yield audio_receiver
+    audio_receiver.loop.close()
+
+def _feed(audio_receiver, pattern):
+    """Push blocks through the callback; 'q' is below threshold, 'L' above."""
+    blocks = []
+    for kind in pattern:
+        block = np.full(BLOCK, 0.1 if kind == 'L' else 0.001, dtype=np.float32)
+        audio_receiver._audio_callback(block.tobytes(), BLOCK, None, None)
+        blocks.append(block.reshape(BLOCK, 1))
+    return blocks
+
+def test_idle_audio_posts_no_stream_events(audio_receiver):
+    _feed(audio_receiver, 'q' * 20)
+    assert not audio_receiver._stream_events
+
+def test_streamed_recording_is_bracketed_and_chunked(audio_receiver):
+    # 10 quiet blocks fill the pre-roll, then 13 loud blocks and silence
+    blocks = _feed(audio_receiver, 'q' * 10 + 'L' * 13 + 'q' * 10)
+    events = list(audio_receiver._stream_events)
+
+    assert events[0] is receiver._STREAM_START
+    assert events[-1] is receiver._STREAM_END
+    chunks = events[1:-1]
+    assert not any(e is receiver._STREAM_START or e is receiver._STREAM_END for e in chunks)
+
+    # The pre-roll plus triggering block is not posted as one piece
+    sizes = [len(chunk) for chunk in chunks]
+    assert all(size == CHUNK for size in sizes[:-1])
+    assert 0 < sizes[-1] <= CHUNK
+
+    # 6 quiet blocks end the recording; the rest of the silence is not sent
+    expected = np.concatenate(blocks[:29])[10 * BLOCK - PRE_ROLL:]
+    np.testing.assert_array_equal(np.concatenate(chunks), expected)
+    assert not audio_receiver.recording
+
+def test_each_recording_restarts_the_stream(audio_receiver):
+    _feed(audio_receiver, 'q' * 10 + 'L' * 5 + 'q' * 10 + 'L' * 7 + 'q' * 10)
+    events = list(audio_receiver._stream_events)
+
+    starts = [i for i, e in enumerate(events) if e is receiver._STREAM_START]
+    ends = [i for i, e in enumerate(events) if e is receiver._STREAM_END]
+    assert len(starts) == len(ends) == 2
+    assert starts[0] < ends[0] < starts[1] < ends[1]
+
+    first = events[starts[0] + 1:ends[0]]
+    second = events[starts[1] + 1:ends[1]]
+    assert sum(len(c) for c in first) == PRE_ROLL + 5 * BLOCK + 6 * BLOCK
+    assert sum(len(c) for c in second) == PRE_ROLL + 7 * BLOCK + 6 * BLOCK
+    assert all(len(c) <= CHUNK for c in first + second)